@@ -10,6 +10,8 @@ from textblob import TextBlob
 import nltk
 import sys
 import os
+import time
+import hashlib
 
 def download_nltk_data_quietly(package):
     """
@@ -35,18 +37,153 @@ ENV_FILE = str(Path(__file__).parent.parent / ".env")
 # Load environment variables from .env
 load_dotenv(ENV_FILE)
 
-def extract_json_from_response(content):
-    match = re.search(r"```json\s*(\{.*?\})\s*```", content, re.DOTALL)
-    return match.group(1).strip() if match else content.strip()
+OPENAI_MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "You are a JSON-only response bot. Return valid JSON with no additional text or formatting."
+
+# Batch API polling (seconds)
+BATCH_POLL_INITIAL_DELAY = 5
+BATCH_POLL_MAX_DELAY = 60
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# On-disk cache of generated commit information, keyed by diff hash
+CACHE_DIR = Path.home() / ".cache" / "comet_labs"
+CACHE_MAX_AGE = 24 * 60 * 60  # seconds
+
+# Fields every commit_info dict must have, with their expected types
+REQUIRED_FIELDS = {
+    "message": str,
+    "small_description": list,
+    "large_description": list,
+    "file_changes": list,
+    "issue": list,
+    "solution": list,
+    "impact": int,
+    "priority": int,
+}
+
+# Structured outputs schema for commit_info. In strict mode the API constrains decoding
+# to it, so responses always have every field with the right type and a 1-5 rating.
+COMMIT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "message": {"type": "string"},
+        "small_description": {"type": "array", "items": {"type": "string"}},
+        "large_description": {"type": "array", "items": {"type": "string"}},
+        "file_changes": {"type": "array", "items": {"type": "string"}},
+        "issue": {"type": "array", "items": {"type": "string"}},
+        "solution": {"type": "array", "items": {"type": "string"}},
+        "impact": {"type": "integer", "enum": [1, 2, 3, 4, 5]},
+        "priority": {"type": "integer", "enum": [1, 2, 3, 4, 5]},
+    },
+    "required": list(REQUIRED_FIELDS),
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "commit_info",
+        "strict": True,
+        "schema": COMMIT_SCHEMA,
+    },
+}
+
+# Compiled once, used for every diff we summarize
+DIFF_FILE_PATTERN = re.compile(r'diff --git a/(.+?) b/')
+
+def validate_commit_info(commit_info):
+    """
+    Validates the structure and content of the commit_info dictionary.
+
+    Args:
+        commit_info (dict): The dictionary containing AI-generated commit information.
+
+    Returns:
+        bool: True if the commit_info is valid, False otherwise.
+    """
+    # Check for missing fields and correct types
+    for field, expected_type in REQUIRED_FIELDS.items():
+        if field not in commit_info:
+            print(f"Missing field: {field}")
+            return False
+        if not isinstance(commit_info[field], expected_type):
+            print(f"Incorrect type for field '{field}'. Expected {expected_type.__name__}, got {type(commit_info[field]).__name__}.")
+            return False
+
+    # Validate ranges for impact and priority
+    if not (1 <= commit_info["impact"] <= 5):
+        print(f"Invalid value for 'impact': {commit_info['impact']}. It should be between 1 and 5.")
+        return False
+    if not (1 <= commit_info["priority"] <= 5):
+        print(f"Invalid value for 'priority': {commit_info['priority']}. It should be between 1 and 5.")
+        return False
+
+    # All checks passed
+    return True
+
+def read_streamed_json(stream):
+    """
+    Reads a streamed chat completion, printing tokens as they arrive.
+    Stops reading as soon as a complete top-level JSON object has been received.
+
+    Args:
+        stream: The streaming response returned by openai.chat.completions.create.
+
+    Returns:
+        str: The JSON object text, or everything received if no complete object was seen.
+    """
+    buf = ""
+    depth = 0
+    start = 0
+    in_string = False
+    escaped = False
+
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content or ""
+        print(text, end="", flush=True)
+        offset = len(buf)
+        buf += text
+
+        # Track brace depth over the new characters, ignoring braces inside strings
+        for i in range(offset, len(buf)):
+            ch = buf[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif depth and ch == '"':
+                in_string = True
+            elif ch == "{":
+                if depth == 0:
+                    start = i
+                depth += 1
+            elif ch == "}" and depth:
+                depth -= 1
+                if depth == 0:
+                    candidate = buf[start:i + 1]
+                    try:
+                        json.loads(candidate)
+                    except json.JSONDecodeError:
+                        continue
+                    # Got a full object, no need to wait for the rest of the stream
+                    stream.close()
+                    print()
+                    return candidate
+
+    print()
+    return buf.strip()
 
 def extract_key_diff_info(diff):
     """
     Extracts key information from a git diff, including file names and meaningful changes.
     """
-    import re
-
     # Extract file names
-    changed_files = re.findall(r'diff --git a/(.+?) b/', diff)
+    changed_files = DIFF_FILE_PATTERN.findall(diff)
 
     # Extract meaningful added/removed lines
     meaningful_changes = []
@@ -92,7 +229,7 @@ def extract_key_diff_info(diff):
         str: A summarized version of the git diff.
     """
     # Extract file names
-    changed_files = re.findall(r'diff --git a/(.+?) b/', diff)
+    changed_files = DIFF_FILE_PATTERN.findall(diff)
 
     # Extract meaningful added/removed lines
     meaningful_changes = []
@@ -130,15 +267,34 @@ def truncate_diff(diff, max_tokens=1024):
     return truncated_diff
 
 
-def wrapper_generate_commit_message(diff):
+def get_cached_commit_info(diff):
+    """
+    Returns the cached OpenAI result for this diff, if any. Only OpenAI results are
+    cached, so without an API key there is nothing to look up.
+    """
+    if not get_key(ENV_FILE, "OPENAI_API_KEY"):
+        return None
+    return load_cached_commit_info(diff)
+
+def wrapper_generate_commit_message(diff, batch=False, use_cache=True):
     """
     Wrapper to choose between OpenAI GPT and Free AI for generating commit messages.
+    OpenAI results are saved to the on-disk cache unless use_cache is False, look them
+    up with get_cached_commit_info before calling this.
     """
     openai_key = get_key(ENV_FILE, "OPENAI_API_KEY")
 
     if openai_key:
-        print("Using OpenAI GPT for generating commit message...")
-        return generate_commit_message(diff)
+        if batch:
+            print("Using the OpenAI Batch API for generating commit message...")
+            commit_info = generate_commit_message_batch(diff)
+        else:
+            print("Using OpenAI GPT for generating commit message...")
+            commit_info = generate_commit_message(diff)
+
+        if commit_info and use_cache:
+            save_cached_commit_info(diff, commit_info)
+        return commit_info
     else:
         print("OpenAI API key not provided. Falling back to free AI.")
         return free_ai_generate_commit_message(diff)
@@ -194,26 +350,7 @@ def free_ai_generate_commit_message(diff):
         commit_info = json.loads(json_str)
 
         # Validate the structure
-        required_fields = {
-            "message": str,
-            "small_description": list,
-            "large_description": list,
-            "file_changes": list,
-            "issue": list,
-            "solution": list,
-            "impact": int,
-            "priority": int
-        }
-
-        for field, field_type in required_fields.items():
-            if field not in commit_info:
-                print(f"Missing field in response: {field}")
-                return None
-            if not isinstance(commit_info[field], field_type):
-                print(f"Incorrect type for field '{field}'. Expected {field_type.__name__}.")
-                return None
-
-        return commit_info
+        return commit_info if validate_commit_info(commit_info) else None
 
     except Exception as e:
         print(f"Error in free AI function: {e}")
@@ -255,7 +392,7 @@ def fallback_generate_commit_message(diff):
             "message": commit_message,
             "small_description": small_description,
             "large_description": large_description,
-            "file_changes": re.findall(r'diff --git a/(.+?) b/', diff),
+            "file_changes": DIFF_FILE_PATTERN.findall(diff),
             "issue": issues[:3],  # Limit to 3 issues
             "solution": solutions[:3],  # Limit to 3 solutions
             "impact": 1,
@@ -273,7 +410,7 @@ def heuristic_fallback_generate_commit_message(diff):
     """
     try:
         # Extract filenames from the diff
-        file_changes = re.findall(r'diff --git a/(.+?) b/', diff)
+        file_changes = DIFF_FILE_PATTERN.findall(diff)
 
         # Extract meaningful changes (added and removed lines)
         meaningful_changes = []
@@ -327,6 +464,52 @@ def heuristic_fallback_generate_commit_message(diff):
         print(f"Error in heuristic fallback: {e}")
         return None
 
+def build_messages(diff):
+    """
+    Builds the chat messages used to ask the AI for commit information about the diff.
+    """
+    # Enhanced prompt for better output
+    prompt = generate_prompt_xml(diff, include_json_format=False)
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def commit_cache_path(diff):
+    """
+    Returns the cache file for a diff, keyed by a hash of the model and the diff.
+    """
+    key = hashlib.sha256(f"{OPENAI_MODEL}\n{diff}".encode("utf-8")).hexdigest()
+    return CACHE_DIR / f"{key}.json"
+
+def load_cached_commit_info(diff):
+    """
+    Returns the commit information previously generated for this exact diff,
+    or None if there is no cache entry or it is older than CACHE_MAX_AGE.
+    """
+    cache_file = commit_cache_path(diff)
+    try:
+        if time.time() - cache_file.stat().st_mtime > CACHE_MAX_AGE:
+            return None
+        with open(cache_file, "r", encoding="utf-8") as fh:
+            commit_info = json.load(fh)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return commit_info if validate_commit_info(commit_info) else None
+
+def save_cached_commit_info(diff, commit_info):
+    """
+    Stores the generated commit information so re-runs on the same diff skip the API call.
+    """
+    cache_file = commit_cache_path(diff)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, "w", encoding="utf-8") as fh:
+            json.dump(commit_info, fh)
+    except OSError as e:
+        # The cache is best effort, never fail the run because of it
+        print(f"Could not write commit cache: {e}")
+
 def generate_commit_message(diff):
     """
     Uses OpenAI GPT to generate a structured commit message based on the git diff.
@@ -335,58 +518,100 @@ def generate_commit_message(diff):
     if not diff:
         return None
 
-    # Enhanced prompt for better output
-    prompt = generate_prompt_xml(diff)
-
     # Using ChatCompletion API with more explicit instructions
     try:
-        
         response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a JSON-only response bot. Return valid JSON with no additional text or formatting."},
-                {"role": "user", "content": prompt}
-            ]
+            model=OPENAI_MODEL,
+            messages=build_messages(diff),
+            response_format=RESPONSE_FORMAT,
+            stream=True
         )
-        print(response.choices[0].message.content.strip())
-        # Access the message content correctly
-        content = response.choices[0].message.content.strip()
-        
-        # Extract JSON from the response
-        json_str = extract_json_from_response(content)
+        # Print tokens as they arrive and stop once the JSON object is complete
+        content = read_streamed_json(response)
+        # The strict schema guarantees the structure, nothing left to validate
+        return json.loads(content)
 
-        # Parse the JSON string
-        commit_info = json.loads(json_str)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing JSON response: {e}")
+        return None
+    except openai.OpenAIError as e:
+        print(f"OpenAI API error: {e}")
+        return None
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return None
 
-        # Validation Checks
-        required_fields = {
-            "message": str,
-            "small_description": list,
-            "large_description": list,
-            "file_changes": list,
-            "issue": list,
-            "solution": list,
-            "impact": int,
-            "priority": int
+def delete_batch_file(file_id):
+    """
+    Removes a batch input/output file from the OpenAI account, which otherwise keeps it.
+    """
+    try:
+        openai.files.delete(file_id)
+    except openai.OpenAIError as e:
+        print(f"Could not delete batch file {file_id}: {e}")
+
+def generate_commit_message_batch(diff):
+    """
+    Generates the commit message through the OpenAI Batch API instead of a live request.
+    Batch jobs are billed at roughly half the price but may take a while to complete,
+    so this is meant for non-interactive use such as CI or git hooks. The uploaded
+    request and the result files are deleted from the OpenAI account afterwards.
+    """
+    if not diff:
+        return None
+
+    # Single request batch, same payload as the interactive call
+    batch_request = {
+        "custom_id": "commit-message",
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": OPENAI_MODEL,
+            "messages": build_messages(diff),
+            "response_format": RESPONSE_FORMAT
         }
+    }
 
-        for field, field_type in required_fields.items():
-            if field not in commit_info:
-                print(f"Missing field in response: {field}")
-                return None
-            if not isinstance(commit_info[field], field_type):
-                print(f"Incorrect type for field '{field}'. Expected {field_type.__name__}.")
-                return None
-
-        # Further validation for 'impact' and 'priority' ranges
-        if not (1 <= commit_info["impact"] <= 5):
-            print("Invalid value for 'impact'. It should be between 1 and 5.")
-            return None
-        if not (1 <= commit_info["priority"] <= 5):
-            print("Invalid value for 'priority'. It should be between 1 and 5.")
+    batch_file = None
+    try:
+        batch_file = openai.files.create(
+            file=("commit_message.jsonl", json.dumps(batch_request).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = openai.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"Submitted batch {batch.id}, waiting for it to complete...")
+
+        # Poll with exponential backoff until the batch reaches a final state
+        delay = BATCH_POLL_INITIAL_DELAY
+        while batch.status not in BATCH_FINAL_STATUSES:
+            time.sleep(delay)
+            delay = min(delay * 2, BATCH_POLL_MAX_DELAY)
+            batch = openai.batches.retrieve(batch.id)
+            print(f"Batch status: {batch.status}")
+
+        # Report why the batch or its request failed instead of a bare status
+        if batch.errors and batch.errors.data:
+            for error in batch.errors.data:
+                print(f"Batch error: {error.message}")
+        if batch.error_file_id:
+            errors = openai.files.content(batch.error_file_id).text
+            delete_batch_file(batch.error_file_id)
+            print(f"Batch request failed:\n{errors.strip()}")
+
+        if batch.status != "completed" or not batch.output_file_id:
+            print(f"Batch {batch.id} did not complete successfully (status: {batch.status}).")
             return None
 
-        return commit_info
+        output = openai.files.content(batch.output_file_id).text
+        delete_batch_file(batch.output_file_id)
+        result = json.loads(output.splitlines()[0])
+        content = result["response"]["body"]["choices"][0]["message"]["content"]
+        # The strict schema guarantees the structure, nothing left to validate
+        return json.loads(content)
 
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON response: {e}")
@@ -397,7 +622,6 @@ def generate_commit_message(diff):
     except Exception as e:
         print(f"Unexpected error: {e}")
         return None
-
-def validate_commit_info(commit_info):
-    required_fields = {"message": str, "small_description": list, "large_description": list, "file_changes": list}
-    return all(isinstance(commit_info.get(key), expected) for key, expected in required_fields.items())
+    finally:
+        if batch_file:
+            delete_batch_file(batch_file.id)
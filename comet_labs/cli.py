@@ -1,8 +1,6 @@
 import sys
-from .utils import get_staged_diff, get_unstaged_changes, add_files_to_stage
-from .ai_helpers import (generate_commit_message, validate_commit_info,
-    wrapper_generate_commit_message)
-from .jira import update_jira_issue, create_jira_issue
+import contextlib
+from .utils import get_staged_diff, get_unstaged_changes, add_files_to_stage, has_staged_changes
 from dotenv import load_dotenv, set_key
 import argparse
 import subprocess
@@ -163,33 +161,80 @@ def initialize():
     print("\n🌟 Thank you for choosing Comet-Labs! Happy coding and smarter commits ahead! 🌟\n")
 
 
-def run():
+def format_commit_message(commit_info):
+    """
+    Builds the full git commit message from the commit information.
+    """
+    # Include a short summary line referencing impact & priority at start of message
+    return "\n".join([
+        commit_info['message'],
+        "",
+        *commit_info['small_description'],
+        "",
+        *commit_info['large_description'],
+        "",
+        f"Impact: {commit_info['impact']}/5",
+        f"Priority: {commit_info['priority']}/5",
+        "",
+        "Files changed:",
+        *commit_info['file_changes'],
+        "",
+        "Issue:",
+        *commit_info['issue'],
+        "",
+        "Solution:",
+        *commit_info['solution'],
+    ])
+
+
+def run(batch=False, use_cache=True):
     """
     Runs the main package functionality for generating commit messages and handling Jira integration.
+    In batch mode nothing is asked: the commit information is returned instead, and the
+    process exits with status 1 if there is none.
     """
+    # Imported here so `--help`, `credits` and `initialize` don't pay for loading
+    # the OpenAI SDK and NLP models
+    from .ai_helpers import wrapper_generate_commit_message, get_cached_commit_info
+    from .jira import update_jira_issue, create_jira_issue, check_jira_credentials, get_jira_config
+
     print("Checking for staged changes...")
-    git_diff = get_staged_diff()
-    if not git_diff:
+    if not has_staged_changes():
+        if batch:
+            # Batch mode runs unattended (CI, git hooks), there is nobody to pick files
+            print("No staged changes found. Stage your changes before running with --batch.")
+            sys.exit(1)
         unstaged = get_unstaged_changes()
         if not unstaged:
             print("No unstaged changes found. Nothing to commit.")
             sys.exit(0)
         else:
             add_files_to_stage(unstaged)
-            git_diff = get_staged_diff()
-            if not git_diff:
+            if not has_staged_changes():
                 print("Still no staged changes. Exiting.")
                 sys.exit(0)
 
-    print("Generating commit information from AI...")
-    
-    commit_info = wrapper_generate_commit_message(git_diff)
+    # Only now read the full diff, it is actually going to be used
+    git_diff = get_staged_diff()
 
+    jira_enabled = bool(get_jira_config()["base_url"])
+    commit_info = get_cached_commit_info(git_diff) if use_cache else None
     if commit_info:
-        if not validate_commit_info(commit_info):
-            print("Commit information is invalid. Exiting.")
-            sys.exit(1)
+        print("Using cached commit information for this diff (pass --no-cache to regenerate).")
+    else:
+        # Rejected Jira credentials would only show up after paying for the AI call, check
+        # them first. Batch mode never talks to Jira, so it doesn't need the round trip.
+        if jira_enabled and not batch:
+            jira_status = check_jira_credentials()
+            if jira_status is False:
+                print("Fix the Jira credentials in your .env (or unset JIRA_BASE_URL to run without Jira). Exiting.")
+                sys.exit(1)
+            jira_enabled = bool(jira_status)
+
+        print("Generating commit information from AI...")
+        commit_info = wrapper_generate_commit_message(git_diff, batch=batch, use_cache=use_cache)
 
+    if commit_info:
         print("\nAI-Generated Commit Information:")
         print(f"Message: {commit_info['message']}")
         print(f"\nBrief Description:\n{commit_info['small_description']}")
@@ -200,6 +245,10 @@ def run():
         print(f"\nIssue:\n{commit_info['issue']}")
         print(f"\nSolution:\n{commit_info['solution']}")
 
+        if batch:
+            # No prompts in batch mode, the caller prints the finished message
+            return commit_info
+
         print("\nDo you have an existing Jira ticket number to associate with this commit?")
         print("(leave blank if no, or enter 'q' to quit):")
         jira_ticket = input().strip()
@@ -210,8 +259,9 @@ def run():
 
         if jira_ticket:
             commit_info['message'] = f"{commit_info['message']} [{jira_ticket}]"
-            update_jira_issue(jira_ticket, commit_info)
-        else:
+            if jira_enabled:
+                update_jira_issue(jira_ticket, commit_info)
+        elif jira_enabled:
             print("No Jira ticket provided. Do you want to create a new ticket? (yes/no/quit)")
             choice = input().strip().lower()
             if choice in ['quit', 'q']:
@@ -230,15 +280,7 @@ def run():
         if choice == 'yes':
             print("Committing changes...")
             try:
-                # Include a short summary line referencing impact & priority at start of message
-                full_commit_message = f"{commit_info['message']}\n\n" \
-                                      f"{commit_info['small_description']}\n\n" \
-                                      f"{commit_info['large_description']}\n\n" \
-                                      f"Impact: {commit_info['impact']}/5\n" \
-                                      f"Priority: {commit_info['priority']}/5\n\n" \
-                                      f"Files changed:\n{commit_info['file_changes']}\n\n" \
-                                      f"Issue:\n{commit_info['issue']}\n\n" \
-                                      f"Solution:\n{commit_info['solution']}"
+                full_commit_message = format_commit_message(commit_info)
 
                 subprocess.run(["git", "commit", "-m", full_commit_message], check=True)
                 print("Changes committed successfully.")
@@ -246,6 +288,7 @@ def run():
                 print(f"Error committing changes: {e}")
     else:
         print("Failed to generate commit information.")
+        sys.exit(1)
 
 
 def main():
@@ -256,7 +299,11 @@ def main():
     subparsers.add_parser("initialize", help="Initialize the package configuration")
 
     # Run command
-    subparsers.add_parser("run", help="Run the main functionality")
+    run_parser = subparsers.add_parser("run", help="Run the main functionality")
+    run_parser.add_argument("--batch", action="store_true",
+                            help="Generate the commit message via the OpenAI Batch API (cheaper, but slower)")
+    run_parser.add_argument("--no-cache", action="store_true",
+                            help="Ignore and don't store cached commit messages for this diff")
 
     # Credits command
     subparsers.add_parser("credits", help="Show project credits")
@@ -266,7 +313,14 @@ def main():
     if args.command == "initialize":
         initialize()
     elif args.command == "run":
-        run()
+        if args.batch:
+            # stdout carries only the commit message for the caller (CI, git hooks),
+            # progress and diagnostics go to stderr
+            with contextlib.redirect_stdout(sys.stderr):
+                commit_info = run(batch=True, use_cache=not args.no_cache)
+            print(format_commit_message(commit_info))
+        else:
+            run(use_cache=not args.no_cache)
     elif args.command == "credits":
         show_credits()
     else:
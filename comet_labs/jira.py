@@ -1,11 +1,100 @@
-import requests
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+@functools.lru_cache(maxsize=1)
+def get_jira_config():
+    """
+    Reads the Jira settings from the environment (the CLI loads .env at startup).
+
+    Returns:
+        dict: base_url, username, api_token and project_key. Missing values are None.
+    """
+    return {
+        "base_url": os.getenv("JIRA_BASE_URL"),
+        "username": os.getenv("JIRA_USERNAME"),
+        "api_token": os.getenv("JIRA_API_TOKEN"),
+        "project_key": os.getenv("JIRA_PROJECT_KEY", "DGA"),
+    }
+
+
+@functools.lru_cache(maxsize=1)
+def get_jira_session():
+    """
+    Creates the session used for all Jira calls so the connection is reused (HTTP keep-alive).
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    jira = get_jira_config()
+    session = requests.Session()
+    session.auth = (jira["username"], jira["api_token"])
+    session.headers.update({
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    })
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
+
+
+def send_jira_request(method, url, **kwargs):
+    """
+    Sends a Jira request from a worker thread. requests.Session isn't thread-safe (shared
+    cookie jar and state), so each call gets its own session with the same auth and
+    headers, mounted on the shared adapters whose connection pools are thread-safe.
+    """
+    import requests
+
+    shared = get_jira_session()
+    session = requests.Session()
+    session.auth = shared.auth
+    session.headers.update(shared.headers)
+    for prefix, adapter in shared.adapters.items():
+        session.mount(prefix, adapter)
+    # Not closed on purpose, closing would also close the shared adapters
+    return session.request(method, url, **kwargs)
+
+
+def check_jira_credentials():
+    """
+    Verifies the Jira settings with a lightweight GET /rest/api/2/myself, so a typo in
+    the URL or an expired token is caught before paying for the AI call.
+
+    Returns:
+        bool: True if Jira accepted the credentials, False if it rejected them (401/403),
+            None if they couldn't be checked (incomplete settings, Jira unreachable).
+    """
+    import requests
+
+    jira = get_jira_config()
+    if not jira["base_url"] or not jira["username"] or not jira["api_token"]:
+        print("Jira configuration is incomplete (JIRA_BASE_URL, JIRA_USERNAME, JIRA_API_TOKEN). Continuing without Jira.")
+        return None
+
+    try:
+        response = get_jira_session().get(f"{jira['base_url']}/rest/api/2/myself", timeout=10)
+    except requests.RequestException as e:
+        print(f"Could not reach Jira at {jira['base_url']}: {e}. Continuing without Jira.")
+        return None
+
+    if response.status_code in [401, 403]:
+        print(f"Jira rejected the credentials for {jira['username']}. Status code: {response.status_code}")
+        return False
+    if response.status_code != 200:
+        print(f"Failed to verify Jira credentials, status code: {response.status_code}. Continuing without Jira.")
+        return None
+    return True
+
 
 def update_jira_issue(issue_key, commit_info):
     """
     Update the Jira issue with the details from the commit_info.
     Add the issue/solution details as a comment, and update the description.
     """
-    if not JIRA_BASE_URL or not JIRA_USERNAME or not JIRA_API_TOKEN:
+    jira = get_jira_config()
+    if not jira["base_url"] or not jira["username"] or not jira["api_token"]:
         print("Jira configuration not found. Skipping Jira updates.")
         return
 
@@ -13,15 +102,11 @@ def update_jira_issue(issue_key, commit_info):
     # Add a comment with the issue and solution
 
     # Get current issue details
-    issue_url = f"{JIRA_BASE_URL}/rest/api/2/issue/{issue_key}"
-    auth = (JIRA_USERNAME, JIRA_API_TOKEN)
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
+    session = get_jira_session()
+    issue_url = f"{jira['base_url']}/rest/api/2/issue/{issue_key}"
 
     # Get current description
-    response = requests.get(issue_url, auth=auth, headers=headers)
+    response = session.get(issue_url)
     if response.status_code != 200:
         print(f"Failed to retrieve Jira issue {issue_key}, status code: {response.status_code}")
         return
@@ -29,9 +114,8 @@ def update_jira_issue(issue_key, commit_info):
     issue_data = response.json()
     current_description = issue_data['fields'].get('description', '')
 
-    # Convert large_description list to string
-    large_description_str = "\n".join(commit_info['large_description'])
-    new_description = (current_description or '') + "\n\n" + large_description_str
+    # Append large_description below the current description
+    new_description = "\n".join([current_description or '', "", *commit_info['large_description']])
 
     # Update issue description
     update_payload = {
@@ -40,36 +124,46 @@ def update_jira_issue(issue_key, commit_info):
         }
     }
 
-    r = requests.put(issue_url, json=update_payload, headers=headers, auth=auth)
-    if r.status_code not in [200, 204]:
-        print(f"Failed to update Jira issue {issue_key} description. Status code: {r.status_code}")
-
     # Add issue/solution as a comment
     comment_url = issue_url + "/comment"
-    # Convert issue and solution lists to strings
-    issue_str = "\n".join(commit_info['issue'])
-    solution_str = "\n".join(commit_info['solution'])
-    comment_text = f"Issue Details:\n{issue_str}\n\nSolution Details:\n{solution_str}"
+    comment_text = "\n".join([
+        "Issue Details:",
+        *commit_info['issue'],
+        "",
+        "Solution Details:",
+        *commit_info['solution'],
+    ])
     comment_payload = {"body": comment_text}
-    c = requests.post(comment_url, json=comment_payload, headers=headers, auth=auth)
+
+    # The description update and the comment don't depend on each other, send them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        update_future = executor.submit(send_jira_request, "PUT", issue_url, json=update_payload)
+        comment_future = executor.submit(send_jira_request, "POST", comment_url, json=comment_payload)
+        r = update_future.result()
+        c = comment_future.result()
+
+    if r.status_code not in [200, 204]:
+        print(f"Failed to update Jira issue {issue_key} description. Status code: {r.status_code}")
     if c.status_code not in [200, 201]:
         print(f"Failed to add comment to Jira issue {issue_key}. Status code: {c.status_code}")
     else:
         print(f"Jira issue {issue_key} successfully updated.")
 
-def create_jira_issue(commit_info, project_key):
+def create_jira_issue(commit_info, project_key=None):
     """
     Create a new Jira issue with the details from commit_info and return the new issue key.
     """
-    if not JIRA_BASE_URL or not JIRA_USERNAME or not JIRA_API_TOKEN:
+    jira = get_jira_config()
+    if not jira["base_url"] or not jira["username"] or not jira["api_token"]:
         print("Jira configuration not found. Skipping Jira issue creation.")
         return None
 
-    issue_url = f"{JIRA_BASE_URL}/rest/api/2/issue"
-    auth = (JIRA_USERNAME, JIRA_API_TOKEN)
+    session = get_jira_session()
+    issue_url = f"{jira['base_url']}/rest/api/2/issue"
+    project_key = project_key or jira["project_key"]
 
     summary = commit_info['message']
-    description = commit_info['large_description']
+    description = "\n".join(commit_info['large_description'])
 
     payload = {
         "fields": {
@@ -84,7 +178,7 @@ def create_jira_issue(commit_info, project_key):
         }
     }
 
-    r = requests.post(issue_url, json=payload, auth=auth)
+    r = session.post(issue_url, json=payload)
     if r.status_code not in [200, 201]:
         print(f"Failed to create Jira issue. Status code: {r.status_code}")
         return None
@@ -92,9 +186,15 @@ def create_jira_issue(commit_info, project_key):
     issue_key = data['key']
 
     # Add issue/solution as comment
-    comment_url = f"{JIRA_BASE_URL}/rest/api/2/issue/{issue_key}/comment"
-    comment_text = f"**Issue Details:**\n{commit_info['issue']}\n\n**Solution Details:**\n{commit_info['solution']}"
-    c = requests.post(comment_url, json={"body": comment_text}, auth=auth)
+    comment_url = f"{jira['base_url']}/rest/api/2/issue/{issue_key}/comment"
+    comment_text = "\n".join([
+        "**Issue Details:**",
+        *commit_info['issue'],
+        "",
+        "**Solution Details:**",
+        *commit_info['solution'],
+    ])
+    c = session.post(comment_url, json={"body": comment_text})
     if c.status_code not in [200, 201]:
         print(f"Failed to add comment to new Jira issue {issue_key}. Status code: {c.status_code}")
 
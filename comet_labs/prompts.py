@@ -1,13 +1,34 @@
-def generate_prompt_xml(diff):
+def generate_prompt_xml(diff, include_json_format=True):
     """
     Generates an XML representation of the prompt based on the provided git diff.
     
     Args:
         diff (str): The git diff input.
+        include_json_format (bool): Whether to spell out the JSON output format. Not needed
+            when the API enforces a response schema.
     
     Returns:
         str: XML representation of the prompt.
     """
+    # The JSON-only instructions and the field listing are only needed without a schema
+    json_instruction_xml = """
+            <instruction>Return ONLY valid JSON, with no additional text, markdown, or formatting outside of the JSON structure.</instruction>""" if include_json_format else ""
+    array_instruction_xml = """
+            <instruction>
+                Use arrays for fields that represent lists (e.g., "small_description", "file_changes", "issue", "solution") instead of single strings with bullet points.
+            </instruction>""" if include_json_format else ""
+    json_structure_xml = """
+        <json_structure>
+            <field name="message" type="string">Short commit message</field>
+            <field name="small_description" type="array">Summary of key changes</field>
+            <field name="large_description" type="array">Detailed description of changes</field>
+            <field name="file_changes" type="array">Changed files with details</field>
+            <field name="issue" type="array">Issues fixed</field>
+            <field name="solution" type="array">Solutions implemented</field>
+            <field name="impact" type="integer">Impact rating</field>
+            <field name="priority" type="integer">Priority rating</field>
+        </json_structure>""" if include_json_format else ""
+
     prompt_xml = f"""
     <prompt>
         <description>
@@ -47,23 +68,9 @@ def generate_prompt_xml(diff):
                 <description>A number between 1-5 indicating the priority of the commit.</description>
             </requirement>
         </requirements>
-        <instructions>
-            <instruction>Return ONLY valid JSON, with no additional text, markdown, or formatting outside of the JSON structure.</instruction>
-            <instruction>All string fields should be plain text without any markdown syntax (e.g., no `- ` bullet points, no `**bold**`).</instruction>
-            <instruction>
-                Use arrays for fields that represent lists (e.g., "small_description", "file_changes", "issue", "solution") instead of single strings with bullet points.
-            </instruction>
-        </instructions>
-        <json_structure>
-            <field name="message" type="string">Short commit message</field>
-            <field name="small_description" type="array">Summary of key changes</field>
-            <field name="large_description" type="array">Detailed description of changes</field>
-            <field name="file_changes" type="array">Changed files with details</field>
-            <field name="issue" type="array">Issues fixed</field>
-            <field name="solution" type="array">Solutions implemented</field>
-            <field name="impact" type="integer">Impact rating</field>
-            <field name="priority" type="integer">Priority rating</field>
-        </json_structure>
+        <instructions>{json_instruction_xml}
+            <instruction>All string fields should be plain text without any markdown syntax (e.g., no `- ` bullet points, no `**bold**`).</instruction>{array_instruction_xml}
+        </instructions>{json_structure_xml}
         <context>
             <field name="git_diff">{diff}</field>
         </context>
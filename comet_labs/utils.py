@@ -1,17 +1,48 @@
+import fnmatch
+import os
 import subprocess
 
+# Files whose diffs are noise for the AI (generated or minified)
+DIFF_SKIP_PATTERNS = ("package-lock.json", "yarn.lock", "poetry.lock", "*.min.js")
+
+
+def git_output(args, condense=False):
+    """
+    Runs a read-only git command in the current directory and returns its output.
+    Output is streamed from git line by line; with condense=True it is passed through
+    condense_diff as it arrives. Failed commands raise CalledProcessError.
+    """
+    # Explicit encoding skips the locale lookup and survives non-UTF-8 file names
+    with subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                          encoding="utf-8", errors="replace") as process:
+        lines = (line.rstrip("\n") for line in process.stdout)
+        if condense:
+            lines = condense_diff(lines)
+        output = "\n".join(lines)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+    return output
+
 
 def get_unstaged_changes():
     try:
-        diff_output = subprocess.check_output(["git", "ls-files", "--others", "--modified", "--exclude-standard"], text=True)
+        diff_output = git_output(["git", "ls-files", "--others", "--modified", "--exclude-standard"])
         return diff_output.strip().split("\n") if diff_output.strip() else []
     except subprocess.CalledProcessError:
         return []
 
 
+def has_staged_changes():
+    """
+    Checks whether anything is staged without reading the diff itself.
+    `git diff --staged --quiet` exits with 1 when there are staged changes and 0 when there are none.
+    """
+    return subprocess.call(["git", "diff", "--staged", "--quiet"], stdin=subprocess.DEVNULL) == 1
+
+
 def get_staged_diff():
     try:
-        return subprocess.check_output(["git", "diff", "--staged"], text=True)
+        return git_output(["git", "diff", "--staged", "--no-color"], condense=True)
     except subprocess.CalledProcessError:
         return None
 
@@ -27,5 +58,57 @@ def add_files_to_stage(files):
         subprocess.run(["git", "add", "."], check=True)
     else:
         indices = [int(i) for i in choice.split() if i.isdigit()]
-        for i in indices:
-            subprocess.run(["git", "add", files[i - 1]], check=True)
+        to_add = [files[i - 1] for i in indices]
+        if to_add:
+            # One git invocation for all selected paths
+            subprocess.run(["git", "add", "--", *to_add], check=True)
+
+
+def condense_diff(lines, max_lines_per_file=200, skip=DIFF_SKIP_PATTERNS):
+    """
+    Shrinks a git diff before it is sent to the AI. Lockfiles and minified files are
+    left out, and each file is cut off after max_lines_per_file lines. Binary files
+    need no handling, without --binary git only prints a "Binary files ... differ" line.
+    Works line by line, so a diff streamed from git never has to be held in memory in full.
+
+    Args:
+        lines (iterable): Lines of the git diff, without trailing newlines.
+        max_lines_per_file (int): Maximum number of lines kept for each changed file.
+        skip (tuple): Filename patterns (fnmatch) whose changes are left out.
+
+    Yields:
+        str: The lines of the condensed diff.
+    """
+    skipping = False
+    kept = truncated = 0
+
+    for line in lines:
+        if line.startswith("diff --git "):
+            if truncated:
+                yield f"... [truncated {truncated} lines] ..."
+            # git quotes paths that contain a double quote, a backslash, control characters or
+            # non-ASCII bytes, e.g. diff --git "a/d\303\251j\303\240/yarn.lock" "b/...".
+            # Paths that only contain spaces are not quoted.
+            if line.endswith('"'):
+                path = line[:-1].rsplit(' "b/', 1)[-1]
+            else:
+                path = line.rsplit(" b/", 1)[-1]
+            skipping = any(fnmatch.fnmatch(os.path.basename(path), pattern) for pattern in skip)
+            kept = truncated = 0
+            yield line
+            if skipping:
+                yield "... [generated file, changes omitted] ..."
+            continue
+
+        if skipping:
+            continue
+
+        # Past the cap we only count lines, they are never kept around
+        if kept < max_lines_per_file:
+            yield line
+            kept += 1
+        else:
+            truncated += 1
+
+    if truncated:
+        yield f"... [truncated {truncated} lines] ..."
@@ -1,41 +1,194 @@
-import openai
 import os
+import sys
 import subprocess
 import json
-from dotenv import load_dotenv
-import requests
-import re
+from concurrent.futures import ThreadPoolExecutor
+import time
+import argparse
+import contextlib
+import functools
+import fnmatch
+import hashlib
+from pathlib import Path
+
+OPENAI_MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "You are a JSON-only response bot. Return valid JSON with no additional text or formatting."
+
+# Batch API polling (seconds)
+BATCH_POLL_INITIAL_DELAY = 5
+BATCH_POLL_MAX_DELAY = 60
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# On-disk cache of generated commit information, keyed by diff hash
+CACHE_DIR = Path.home() / ".cache" / "comet_labs"
+CACHE_MAX_AGE = 24 * 60 * 60  # seconds
+
+# Fields every commit_info dict must have, with their expected types
+REQUIRED_FIELDS = {
+    "message": str,
+    "small_description": list,
+    "large_description": list,
+    "file_changes": list,
+    "issue": list,
+    "solution": list,
+    "impact": int,
+    "priority": int,
+}
+
+# Structured outputs schema for commit_info. In strict mode the API constrains decoding
+# to it, so responses always have every field with the right type and a 1-5 rating.
+COMMIT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "message": {"type": "string"},
+        "small_description": {"type": "array", "items": {"type": "string"}},
+        "large_description": {"type": "array", "items": {"type": "string"}},
+        "file_changes": {"type": "array", "items": {"type": "string"}},
+        "issue": {"type": "array", "items": {"type": "string"}},
+        "solution": {"type": "array", "items": {"type": "string"}},
+        "impact": {"type": "integer", "enum": [1, 2, 3, 4, 5]},
+        "priority": {"type": "integer", "enum": [1, 2, 3, 4, 5]},
+    },
+    "required": list(REQUIRED_FIELDS),
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "commit_info",
+        "strict": True,
+        "schema": COMMIT_SCHEMA,
+    },
+}
+
+# Files whose diffs are noise for the AI (generated or minified)
+DIFF_SKIP_PATTERNS = ("package-lock.json", "yarn.lock", "poetry.lock", "*.min.js")
+
+@functools.lru_cache(maxsize=1)
+def load_env():
+    """
+    Loads environment variables from the .env file, once, the first time a setting is needed.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+@functools.lru_cache(maxsize=1)
+def get_jira_config():
+    """
+    Reads the Jira settings from the environment.
+
+    Returns:
+        dict: base_url, username, api_token and project_key. Missing values are None.
+    """
+    load_env()
+    return {
+        "base_url": os.getenv("JIRA_BASE_URL"),
+        "username": os.getenv("JIRA_USERNAME"),
+        "api_token": os.getenv("JIRA_API_TOKEN"),
+        "project_key": os.getenv("JIRA_PROJECT_KEY", "DGA"),
+    }
+
+@functools.lru_cache(maxsize=1)
+def get_jira_session():
+    """
+    Creates the session used for all Jira calls so the connection is reused (HTTP keep-alive).
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    jira = get_jira_config()
+    session = requests.Session()
+    session.auth = (jira["username"], jira["api_token"])
+    session.headers.update({
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    })
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
 
-# Load environment variables from .env file
-load_dotenv()
+def send_jira_request(method, url, **kwargs):
+    """
+    Sends a Jira request from a worker thread. requests.Session isn't thread-safe (shared
+    cookie jar and state), so each call gets its own session with the same auth and
+    headers, mounted on the shared adapters whose connection pools are thread-safe.
+    """
+    import requests
+
+    shared = get_jira_session()
+    session = requests.Session()
+    session.auth = shared.auth
+    session.headers.update(shared.headers)
+    for prefix, adapter in shared.adapters.items():
+        session.mount(prefix, adapter)
+    # Not closed on purpose, closing would also close the shared adapters
+    return session.request(method, url, **kwargs)
+
+@functools.lru_cache(maxsize=1)
+def get_openai_key():
+    """
+    Reads the OpenAI API key, raising ValueError if it isn't set.
+    """
+    load_env()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("Please set the OPENAI_API_KEY environment variable")
+    return api_key
+
+@functools.lru_cache(maxsize=1)
+def get_openai():
+    """
+    Imports the OpenAI SDK and sets the API key on first use, so runs that never
+    reach the API (--help, nothing staged, cached results) skip both.
+    """
+    import openai
 
-# Get API key from environment variable
-openai.api_key = os.getenv("OPENAI_API_KEY")
-if not openai.api_key:
-    raise ValueError("Please set the OPENAI_API_KEY environment variable")
+    openai.api_key = get_openai_key()
+    return openai
 
-JIRA_BASE_URL = os.getenv("JIRA_BASE_URL")
-JIRA_USERNAME = os.getenv("JIRA_USERNAME")
-JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
-JIRA_PROJECT_KEY = os.getenv("JIRA_PROJECT_KEY", "DGA")
+def git_output(args, condense=False):
+    """
+    Runs a read-only git command in the current directory and returns its output.
+    Output is streamed from git line by line; with condense=True it is passed through
+    condense_diff as it arrives. Failed commands raise CalledProcessError.
+    """
+    # Explicit encoding skips the locale lookup and survives non-UTF-8 file names
+    with subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                          encoding="utf-8", errors="replace") as process:
+        lines = (line.rstrip("\n") for line in process.stdout)
+        if condense:
+            lines = condense_diff(lines)
+        output = "\n".join(lines)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+    return output
 
 def get_unstaged_changes():
     """
     Get list of files that have changes but are not staged.
     """
     try:
-        diff_output = subprocess.check_output(["git", "ls-files", "--others", "--modified", "--exclude-standard"], text=True)
+        diff_output = git_output(["git", "ls-files", "--others", "--modified", "--exclude-standard"])
         files = diff_output.strip().split('\n') if diff_output.strip() else []
         return files
     except subprocess.CalledProcessError:
         return []
 
+def has_staged_changes():
+    """
+    Checks whether anything is staged without reading the diff itself.
+    `git diff --staged --quiet` exits with 1 when there are staged changes and 0 when there are none.
+    """
+    return subprocess.call(["git", "diff", "--staged", "--quiet"], stdin=subprocess.DEVNULL) == 1
+
 def get_staged_diff():
     """
-    Gets the current staged git diff.
+    Gets the current staged git diff, condensed so lockfiles and huge hunks
+    don't blow up the token count.
     """
     try:
-        diff_output = subprocess.check_output(["git", "diff", "--staged"], text=True)
+        diff_output = git_output(["git", "diff", "--staged", "--no-color"], condense=True)
         return diff_output
     except subprocess.CalledProcessError as e:
         print("Error getting git diff:", e)
@@ -51,19 +204,8 @@ def validate_commit_info(commit_info):
     Returns:
         bool: True if the commit_info is valid, False otherwise.
     """
-    required_fields = {
-        "message": str,
-        "small_description": list,
-        "large_description": list,
-        "file_changes": list,
-        "issue": list,
-        "solution": list,
-        "impact": int,
-        "priority": int,
-    }
-
     # Check for missing fields and correct types
-    for field, expected_type in required_fields.items():
+    for field, expected_type in REQUIRED_FIELDS.items():
         if field not in commit_info:
             print(f"Missing field: {field}")
             return False
@@ -82,30 +224,62 @@ def validate_commit_info(commit_info):
     # All checks passed
     return True
     
-def extract_json_from_response(response_content):
+def read_streamed_json(stream):
     """
-    Extracts JSON content from a string that may be wrapped in Markdown code blocks.
-    
+    Reads a streamed chat completion, printing tokens as they arrive.
+    Stops reading as soon as a complete top-level JSON object has been received.
+
     Args:
-        response_content (str): The raw response from the AI.
-        
+        stream: The streaming response returned by openai.chat.completions.create.
+
     Returns:
-        str: The extracted JSON string.
-        
-    Raises:
-        ValueError: If no JSON content is found in the expected format.
-    """
-    # Regular expression to match ```json ... ```
-    json_block_pattern = r"```json\s*(\{.*?\})\s*```"
-    match = re.search(json_block_pattern, response_content, re.DOTALL)
-    
-    if match:
-        json_str = match.group(1).strip()
-        return json_str
-    else:
-        # If not wrapped in code block, assume the entire content is JSON
-        # Optionally, you can add more sophisticated checks here
-        return response_content.strip()
+        str: The JSON object text, or everything received if no complete object was seen.
+    """
+    buf = ""
+    depth = 0
+    start = 0
+    in_string = False
+    escaped = False
+
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content or ""
+        print(text, end="", flush=True)
+        offset = len(buf)
+        buf += text
+
+        # Track brace depth over the new characters, ignoring braces inside strings
+        for i in range(offset, len(buf)):
+            ch = buf[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif depth and ch == '"':
+                in_string = True
+            elif ch == "{":
+                if depth == 0:
+                    start = i
+                depth += 1
+            elif ch == "}" and depth:
+                depth -= 1
+                if depth == 0:
+                    candidate = buf[start:i + 1]
+                    try:
+                        json.loads(candidate)
+                    except json.JSONDecodeError:
+                        continue
+                    # Got a full object, no need to wait for the rest of the stream
+                    stream.close()
+                    print()
+                    return candidate
+
+    print()
+    return buf.strip()
 
 def add_files_to_stage(files):
     """
@@ -126,6 +300,7 @@ def add_files_to_stage(files):
         print("Exiting script...")
         exit(0)
     
+
     if not choice:
         # Stage all files using 'git add .'
         try:
@@ -140,22 +315,67 @@ def add_files_to_stage(files):
         indices = [int(x) for x in choice.split()]
         to_add = [files[i-1] for i in indices if 0 < i <= len(files)]
         if to_add:
-            for f in to_add:
-                subprocess.run(["git", "add", f], check=True)
+            # One git invocation for all selected paths
+            subprocess.run(["git", "add", "--", *to_add], check=True)
             print("Selected files have been staged.")
         else:
             print("No valid files selected. No files were staged.")
     except ValueError:
         print("Invalid input. No files were staged.")
 
-def generate_commit_message(diff):
+def condense_diff(lines, max_lines_per_file=200, skip=DIFF_SKIP_PATTERNS):
     """
-    Uses OpenAI GPT to generate a structured commit message based on the git diff.
-    Returns a JSON object with message, descriptions, impact, and priority.
+    Shrinks a git diff before it is sent to the AI. Lockfiles and minified files are
+    left out, and each file is cut off after max_lines_per_file lines. Binary files
+    need no handling, without --binary git only prints a "Binary files ... differ" line.
+    Works line by line, so a diff streamed from git never has to be held in memory in full.
+
+    Args:
+        lines (iterable): Lines of the git diff, without trailing newlines.
+        max_lines_per_file (int): Maximum number of lines kept for each changed file.
+        skip (tuple): Filename patterns (fnmatch) whose changes are left out.
+
+    Yields:
+        str: The lines of the condensed diff.
     """
-    if not diff:
-        return None
+    skipping = False
+    kept = truncated = 0
+
+    for line in lines:
+        if line.startswith("diff --git "):
+            if truncated:
+                yield f"... [truncated {truncated} lines] ..."
+            # git quotes paths that contain a double quote, a backslash, control characters or
+            # non-ASCII bytes, e.g. diff --git "a/d\303\251j\303\240/yarn.lock" "b/...".
+            # Paths that only contain spaces are not quoted.
+            if line.endswith('"'):
+                path = line[:-1].rsplit(' "b/', 1)[-1]
+            else:
+                path = line.rsplit(" b/", 1)[-1]
+            skipping = any(fnmatch.fnmatch(os.path.basename(path), pattern) for pattern in skip)
+            kept = truncated = 0
+            yield line
+            if skipping:
+                yield "... [generated file, changes omitted] ..."
+            continue
+
+        if skipping:
+            continue
+
+        # Past the cap we only count lines, they are never kept around
+        if kept < max_lines_per_file:
+            yield line
+            kept += 1
+        else:
+            truncated += 1
 
+    if truncated:
+        yield f"... [truncated {truncated} lines] ..."
+
+def build_messages(diff):
+    """
+    Builds the chat messages used to ask the AI for commit information about the diff.
+    """
     # Enhanced prompt for better output
     prompt = f"""
 You are an assistant tasked with analyzing the provided git diff and generating a JSON-only output.
@@ -172,75 +392,167 @@ Analyze the code changes in detail and produce a JSON structure that includes:
 
 **Important Instructions:**
 
-- **Return ONLY valid JSON**, with no additional text, markdown, or formatting outside of the JSON structure.
 - **All string fields should be plain text** without any markdown syntax (e.g., no `- ` bullet points, no `**bold**`).
-- **Use arrays** for fields that represent lists (e.g., "small_description", "file_changes", "issue", "solution") instead of single strings with bullet points.
-
-**JSON Structure:**
-{{
-    "message": "...",
-    "small_description": ["...", "..."],
-    "large_description": ["...", "..."],
-    "file_changes": ["...", "..."],
-    "issue": ["...", "..."],
-    "solution": ["...", "..."],
-    "impact": ...,
-    "priority": ...
-}}
 
 Git Diff:
 {diff}
 """
 
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def commit_cache_path(diff):
+    """
+    Returns the cache file for a diff, keyed by a hash of the model and the diff.
+    """
+    key = hashlib.sha256(f"{OPENAI_MODEL}\n{diff}".encode("utf-8")).hexdigest()
+    return CACHE_DIR / f"{key}.json"
+
+def load_cached_commit_info(diff):
+    """
+    Returns the commit information previously generated for this exact diff,
+    or None if there is no cache entry or it is older than CACHE_MAX_AGE.
+    """
+    cache_file = commit_cache_path(diff)
+    try:
+        if time.time() - cache_file.stat().st_mtime > CACHE_MAX_AGE:
+            return None
+        with open(cache_file, "r", encoding="utf-8") as fh:
+            commit_info = json.load(fh)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return commit_info if validate_commit_info(commit_info) else None
+
+def save_cached_commit_info(diff, commit_info):
+    """
+    Stores the generated commit information so re-runs on the same diff skip the API call.
+    """
+    cache_file = commit_cache_path(diff)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, "w", encoding="utf-8") as fh:
+            json.dump(commit_info, fh)
+    except OSError as e:
+        # The cache is best effort, never fail the run because of it
+        print(f"Could not write commit cache: {e}")
+
+def generate_commit_message(diff):
+    """
+    Uses OpenAI GPT to generate a structured commit message based on the git diff.
+    Returns a JSON object with message, descriptions, impact, and priority.
+    """
+    if not diff:
+        return None
+
+    try:
+        openai = get_openai()
+    except ValueError as e:
+        print(e)
+        return None
+
     # Using ChatCompletion API with more explicit instructions
     try:
-        
         response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a JSON-only response bot. Return valid JSON with no additional text or formatting."},
-                {"role": "user", "content": prompt}
-            ]
+            model=OPENAI_MODEL,
+            messages=build_messages(diff),
+            response_format=RESPONSE_FORMAT,
+            stream=True
         )
-        print(response.choices[0].message.content.strip())
-        # Access the message content correctly
-        content = response.choices[0].message.content.strip()
-        
-        # Extract JSON from the response
-        json_str = extract_json_from_response(content)
-
-        # Parse the JSON string
-        commit_info = json.loads(json_str)
-
-        # Validation Checks
-        required_fields = {
-            "message": str,
-            "small_description": list,
-            "large_description": list,
-            "file_changes": list,
-            "issue": list,
-            "solution": list,
-            "impact": int,
-            "priority": int
+        # Print tokens as they arrive and stop once the JSON object is complete
+        content = read_streamed_json(response)
+        # The strict schema guarantees the structure, nothing left to validate
+        return json.loads(content)
+
+    except json.JSONDecodeError as e:
+        print(f"Error parsing JSON response: {e}")
+        return None
+    except openai.OpenAIError as e:
+        print(f"OpenAI API error: {e}")
+        return None
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return None
+
+def delete_batch_file(file_id):
+    """
+    Removes a batch input/output file from the OpenAI account, which otherwise keeps it.
+    """
+    openai = get_openai()
+    try:
+        openai.files.delete(file_id)
+    except openai.OpenAIError as e:
+        print(f"Could not delete batch file {file_id}: {e}")
+
+def generate_commit_message_batch(diff):
+    """
+    Generates the commit message through the OpenAI Batch API instead of a live request.
+    Batch jobs are billed at roughly half the price but may take a while to complete,
+    so this is meant for non-interactive use such as CI or git hooks. The uploaded
+    request and the result files are deleted from the OpenAI account afterwards.
+    """
+    if not diff:
+        return None
+
+    try:
+        openai = get_openai()
+    except ValueError as e:
+        print(e)
+        return None
+
+    # Single request batch, same payload as the interactive call
+    batch_request = {
+        "custom_id": "commit-message",
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": OPENAI_MODEL,
+            "messages": build_messages(diff),
+            "response_format": RESPONSE_FORMAT
         }
+    }
 
-        for field, field_type in required_fields.items():
-            if field not in commit_info:
-                print(f"Missing field in response: {field}")
-                return None
-            if not isinstance(commit_info[field], field_type):
-                print(f"Incorrect type for field '{field}'. Expected {field_type.__name__}.")
-                return None
-
-        # Further validation for 'impact' and 'priority' ranges
-        if not (1 <= commit_info["impact"] <= 5):
-            print("Invalid value for 'impact'. It should be between 1 and 5.")
-            return None
-        if not (1 <= commit_info["priority"] <= 5):
-            print("Invalid value for 'priority'. It should be between 1 and 5.")
+    batch_file = None
+    try:
+        batch_file = openai.files.create(
+            file=("commit_message.jsonl", json.dumps(batch_request).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = openai.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"Submitted batch {batch.id}, waiting for it to complete...")
+
+        # Poll with exponential backoff until the batch reaches a final state
+        delay = BATCH_POLL_INITIAL_DELAY
+        while batch.status not in BATCH_FINAL_STATUSES:
+            time.sleep(delay)
+            delay = min(delay * 2, BATCH_POLL_MAX_DELAY)
+            batch = openai.batches.retrieve(batch.id)
+            print(f"Batch status: {batch.status}")
+
+        # Report why the batch or its request failed instead of a bare status
+        if batch.errors and batch.errors.data:
+            for error in batch.errors.data:
+                print(f"Batch error: {error.message}")
+        if batch.error_file_id:
+            errors = openai.files.content(batch.error_file_id).text
+            delete_batch_file(batch.error_file_id)
+            print(f"Batch request failed:\n{errors.strip()}")
+
+        if batch.status != "completed" or not batch.output_file_id:
+            print(f"Batch {batch.id} did not complete successfully (status: {batch.status}).")
             return None
 
-        return commit_info
+        output = openai.files.content(batch.output_file_id).text
+        delete_batch_file(batch.output_file_id)
+        result = json.loads(output.splitlines()[0])
+        content = result["response"]["body"]["choices"][0]["message"]["content"]
+        # The strict schema guarantees the structure, nothing left to validate
+        return json.loads(content)
 
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON response: {e}")
@@ -251,13 +563,47 @@ Git Diff:
     except Exception as e:
         print(f"Unexpected error: {e}")
         return None
+    finally:
+        if batch_file:
+            delete_batch_file(batch_file.id)
+
+def check_jira_credentials():
+    """
+    Verifies the Jira settings with a lightweight GET /rest/api/2/myself, so a typo in
+    the URL or an expired token is caught before paying for the AI call.
+
+    Returns:
+        bool: True if Jira accepted the credentials, False if it rejected them (401/403),
+            None if they couldn't be checked (incomplete settings, Jira unreachable).
+    """
+    import requests
+
+    jira = get_jira_config()
+    if not jira["base_url"] or not jira["username"] or not jira["api_token"]:
+        print("Jira configuration is incomplete (JIRA_BASE_URL, JIRA_USERNAME, JIRA_API_TOKEN). Continuing without Jira.")
+        return None
+
+    try:
+        response = get_jira_session().get(f"{jira['base_url']}/rest/api/2/myself", timeout=10)
+    except requests.RequestException as e:
+        print(f"Could not reach Jira at {jira['base_url']}: {e}. Continuing without Jira.")
+        return None
+
+    if response.status_code in [401, 403]:
+        print(f"Jira rejected the credentials for {jira['username']}. Status code: {response.status_code}")
+        return False
+    if response.status_code != 200:
+        print(f"Failed to verify Jira credentials, status code: {response.status_code}. Continuing without Jira.")
+        return None
+    return True
 
 def update_jira_issue(issue_key, commit_info):
     """
     Update the Jira issue with the details from the commit_info.
     Add the issue/solution details as a comment, and update the description.
     """
-    if not JIRA_BASE_URL or not JIRA_USERNAME or not JIRA_API_TOKEN:
+    jira = get_jira_config()
+    if not jira["base_url"] or not jira["username"] or not jira["api_token"]:
         print("Jira configuration not found. Skipping Jira updates.")
         return
 
@@ -265,15 +611,11 @@ def update_jira_issue(issue_key, commit_info):
     # Add a comment with the issue and solution
 
     # Get current issue details
-    issue_url = f"{JIRA_BASE_URL}/rest/api/2/issue/{issue_key}"
-    auth = (JIRA_USERNAME, JIRA_API_TOKEN)
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
+    session = get_jira_session()
+    issue_url = f"{jira['base_url']}/rest/api/2/issue/{issue_key}"
 
     # Get current description
-    response = requests.get(issue_url, auth=auth, headers=headers)
+    response = session.get(issue_url)
     if response.status_code != 200:
         print(f"Failed to retrieve Jira issue {issue_key}, status code: {response.status_code}")
         return
@@ -281,9 +623,8 @@ def update_jira_issue(issue_key, commit_info):
     issue_data = response.json()
     current_description = issue_data['fields'].get('description', '')
 
-    # Convert large_description list to string
-    large_description_str = "\n".join(commit_info['large_description'])
-    new_description = (current_description or '') + "\n\n" + large_description_str
+    # Append large_description below the current description
+    new_description = "\n".join([current_description or '', "", *commit_info['large_description']])
 
     # Update issue description
     update_payload = {
@@ -292,18 +633,26 @@ def update_jira_issue(issue_key, commit_info):
         }
     }
 
-    r = requests.put(issue_url, json=update_payload, headers=headers, auth=auth)
-    if r.status_code not in [200, 204]:
-        print(f"Failed to update Jira issue {issue_key} description. Status code: {r.status_code}")
-
     # Add issue/solution as a comment
     comment_url = issue_url + "/comment"
-    # Convert issue and solution lists to strings
-    issue_str = "\n".join(commit_info['issue'])
-    solution_str = "\n".join(commit_info['solution'])
-    comment_text = f"Issue Details:\n{issue_str}\n\nSolution Details:\n{solution_str}"
+    comment_text = "\n".join([
+        "Issue Details:",
+        *commit_info['issue'],
+        "",
+        "Solution Details:",
+        *commit_info['solution'],
+    ])
     comment_payload = {"body": comment_text}
-    c = requests.post(comment_url, json=comment_payload, headers=headers, auth=auth)
+
+    # The description update and the comment don't depend on each other, send them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        update_future = executor.submit(send_jira_request, "PUT", issue_url, json=update_payload)
+        comment_future = executor.submit(send_jira_request, "POST", comment_url, json=comment_payload)
+        r = update_future.result()
+        c = comment_future.result()
+
+    if r.status_code not in [200, 204]:
+        print(f"Failed to update Jira issue {issue_key} description. Status code: {r.status_code}")
     if c.status_code not in [200, 201]:
         print(f"Failed to add comment to Jira issue {issue_key}. Status code: {c.status_code}")
     else:
@@ -313,15 +662,16 @@ def create_jira_issue(commit_info, project_key):
     """
     Create a new Jira issue with the details from commit_info and return the new issue key.
     """
-    if not JIRA_BASE_URL or not JIRA_USERNAME or not JIRA_API_TOKEN:
+    jira = get_jira_config()
+    if not jira["base_url"] or not jira["username"] or not jira["api_token"]:
         print("Jira configuration not found. Skipping Jira issue creation.")
         return None
 
-    issue_url = f"{JIRA_BASE_URL}/rest/api/2/issue"
-    auth = (JIRA_USERNAME, JIRA_API_TOKEN)
+    session = get_jira_session()
+    issue_url = f"{jira['base_url']}/rest/api/2/issue"
 
     summary = commit_info['message']
-    description = commit_info['large_description']
+    description = "\n".join(commit_info['large_description'])
 
     payload = {
         "fields": {
@@ -336,7 +686,7 @@ def create_jira_issue(commit_info, project_key):
         }
     }
 
-    r = requests.post(issue_url, json=payload, auth=auth)
+    r = session.post(issue_url, json=payload)
     if r.status_code not in [200, 201]:
         print(f"Failed to create Jira issue. Status code: {r.status_code}")
         return None
@@ -344,19 +694,58 @@ def create_jira_issue(commit_info, project_key):
     issue_key = data['key']
 
     # Add issue/solution as comment
-    comment_url = f"{JIRA_BASE_URL}/rest/api/2/issue/{issue_key}/comment"
-    comment_text = f"**Issue Details:**\n{commit_info['issue']}\n\n**Solution Details:**\n{commit_info['solution']}"
-    c = requests.post(comment_url, json={"body": comment_text}, auth=auth)
+    comment_url = f"{jira['base_url']}/rest/api/2/issue/{issue_key}/comment"
+    comment_text = "\n".join([
+        "**Issue Details:**",
+        *commit_info['issue'],
+        "",
+        "**Solution Details:**",
+        *commit_info['solution'],
+    ])
+    c = session.post(comment_url, json={"body": comment_text})
     if c.status_code not in [200, 201]:
         print(f"Failed to add comment to new Jira issue {issue_key}. Status code: {c.status_code}")
 
     print(f"New Jira issue {issue_key} created successfully.")
     return issue_key
 
-def main():
+def format_commit_message(commit_info):
+    """
+    Builds the full git commit message from the commit information.
+    """
+    # Include a short summary line referencing impact & priority at start of message
+    return "\n".join([
+        commit_info['message'],
+        "",
+        *commit_info['small_description'],
+        "",
+        *commit_info['large_description'],
+        "",
+        f"Impact: {commit_info['impact']}/5",
+        f"Priority: {commit_info['priority']}/5",
+        "",
+        "Files changed:",
+        *commit_info['file_changes'],
+        "",
+        "Issue:",
+        *commit_info['issue'],
+        "",
+        "Solution:",
+        *commit_info['solution'],
+    ])
+
+def run(batch=False, use_cache=True):
+    """
+    Generates the commit message for the staged changes and handles the Jira and commit prompts.
+    In batch mode nothing is asked: the commit information is returned instead, and the
+    process exits with status 1 if there is none.
+    """
     print("Checking for staged changes...")
-    git_diff = get_staged_diff()
-    if not git_diff:
+    if not has_staged_changes():
+        if batch:
+            # Batch mode runs unattended (CI, git hooks), there is nobody to pick files
+            print("No staged changes found. Stage your changes before running with --batch.")
+            sys.exit(1)
         # No staged changes, let user add them
         unstaged = get_unstaged_changes()
         if not unstaged:
@@ -366,20 +755,41 @@ def main():
             print("No staged changes found.")
             add_files_to_stage(unstaged)
             # Check again after adding
-            git_diff = get_staged_diff()
-            if not git_diff:
+            if not has_staged_changes():
                 print("Still no staged changes. Exiting.")
                 return
-    
-    print("Generating commit information from AI...")
-    commit_info = generate_commit_message(git_diff)
+
+    # Only now read the full diff, it is actually going to be used
+    git_diff = get_staged_diff()
+    jira_enabled = bool(get_jira_config()["base_url"])
+    commit_info = load_cached_commit_info(git_diff) if use_cache else None
+    if commit_info:
+        print("Using cached commit information for this diff (pass --no-cache to regenerate).")
+    else:
+        # Only a cache miss needs the API; fail (non-zero, for CI) before calling Jira or OpenAI
+        try:
+            get_openai_key()
+        except ValueError as e:
+            sys.exit(str(e))
+
+        # Rejected Jira credentials would only show up after paying for the AI call, check
+        # them first. Batch mode never talks to Jira, so it doesn't need the round trip.
+        if jira_enabled and not batch:
+            jira_status = check_jira_credentials()
+            if jira_status is False:
+                print("Fix the Jira credentials in your .env (or unset JIRA_BASE_URL to run without Jira). Exiting.")
+                sys.exit(1)
+            jira_enabled = bool(jira_status)
+
+        print("Generating commit information from AI...")
+        if batch:
+            commit_info = generate_commit_message_batch(git_diff)
+        else:
+            commit_info = generate_commit_message(git_diff)
+        if commit_info and use_cache:
+            save_cached_commit_info(git_diff, commit_info)
     
     if commit_info:
-        # Validate the commit_info structure
-        if not validate_commit_info(commit_info):
-            print("Commit information is invalid. Exiting.")
-            return
-        
         print("\nAI-Generated Commit Information:")
         print(f"Message: {commit_info['message']}")
         print(f"\nBrief Description:\n{commit_info['small_description']}")
@@ -390,6 +800,10 @@ def main():
         print(f"\nIssue:\n{commit_info['issue']}")
         print(f"\nSolution:\n{commit_info['solution']}")
 
+        if batch:
+            # No prompts in batch mode, the caller prints the finished message
+            return commit_info
+
         # Ask user for Jira ticket number
         print("\nDo you have an existing Jira ticket number to associate with this commit?")
         print("(leave blank if no, or enter 'q' to quit):")
@@ -403,8 +817,9 @@ def main():
             # Append ticket to commit message
             commit_info['message'] = f"{commit_info['message']} [{jira_ticket}]"
             print(f"Appending Jira ticket {jira_ticket} to commit message.")
-            update_jira_issue(jira_ticket, commit_info)
-        else:
+            if jira_enabled:
+                update_jira_issue(jira_ticket, commit_info)
+        elif jira_enabled:
             # No ticket provided
             print("No Jira ticket provided. Do you want to create a new ticket? (yes/no/quit)")
             choice = input().strip().lower()
@@ -412,8 +827,9 @@ def main():
                 print("Exiting script...")
                 exit(0)
             if choice == 'yes':
-                print(f"Creating new Jira ticket in project {JIRA_PROJECT_KEY}...")
-                new_issue_key = create_jira_issue(commit_info, JIRA_PROJECT_KEY)
+                project_key = get_jira_config()["project_key"]
+                print(f"Creating new Jira ticket in project {project_key}...")
+                new_issue_key = create_jira_issue(commit_info, project_key)
                 if new_issue_key:
                     commit_info['message'] = f"{commit_info['message']} [{new_issue_key}]"
                     print(f"Appended newly created Jira issue {new_issue_key} to commit message.")
@@ -426,15 +842,7 @@ def main():
             exit(0)
         if user_choice == "yes":
             try:
-                # Include a short summary line referencing impact & priority at start of message
-                full_commit_message = f"{commit_info['message']}\n\n" \
-                                      f"{commit_info['small_description']}\n\n" \
-                                      f"{commit_info['large_description']}\n\n" \
-                                      f"Impact: {commit_info['impact']}/5\n" \
-                                      f"Priority: {commit_info['priority']}/5\n\n" \
-                                      f"Files changed:\n{commit_info['file_changes']}\n\n" \
-                                      f"Issue:\n{commit_info['issue']}\n\n" \
-                                      f"Solution:\n{commit_info['solution']}"
+                full_commit_message = format_commit_message(commit_info)
 
                 subprocess.run(["git", "commit", "-m", full_commit_message], check=True)
                 print("Changes committed successfully.")
@@ -444,6 +852,25 @@ def main():
             print("Commit message discarded.")
     else:
         print("Failed to generate commit information.")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="AI-driven commit messages with Jira integration.")
+    parser.add_argument("--batch", action="store_true",
+                        help="Generate the commit message via the OpenAI Batch API (cheaper, but slower)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore and don't store cached commit messages for this diff")
+    args = parser.parse_args()
+
+    if args.batch:
+        # stdout carries only the commit message for the caller (CI, git hooks),
+        # progress and diagnostics go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            commit_info = run(batch=True, use_cache=not args.no_cache)
+        if commit_info:
+            print(format_commit_message(commit_info))
+    else:
+        run(use_cache=not args.no_cache)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file